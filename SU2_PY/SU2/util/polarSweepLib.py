@@ -912,7 +912,7 @@ def testComponentSum(cbdOutput,verbose):
 
     data,nd=loadArray(cbdOutput,6)
 # transpose the array
-    td=zip(*data)
+    td=list(zip(*data))
 # now check correct som for each variable
     eps=0.01
     errorA=[]
@@ -28,7 +28,7 @@
 # imports
 import numpy as np
 from optparse import OptionParser
-import os, sys, shutil, copy
+import os, sys
 import SU2
 
 # Command Line Options
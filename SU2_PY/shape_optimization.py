@@ -25,69 +25,77 @@
 # You should have received a copy of the GNU Lesser General Public
 # License along with SU2. If not, see <http://www.gnu.org/licenses/>.
 
-import os, sys, shutil
-from optparse import OptionParser
+import os, sys, copy
+import numpy as np
+from functools import lru_cache
+from argparse import ArgumentParser
 sys.path.append(os.environ['SU2_RUN'])
 import SU2
 
+# banner printed by main()
+_BANNER = """
+-------------------------------------------------------------------------
+|    ___ _   _ ___                                                      |
+|   / __| | | |_  )   Release 7.0.3 "Blackbird"                         |
+|   \\__ \\ |_| |/ /                                                      |
+|   |___/\\___//___|   Aerodynamic Shape Optimization Script             |
+|                                                                       |
+-------------------------------------------------------------------------
+| SU2 Project Website: https://su2code.github.io                        |
+|                                                                       |
+| The SU2 Project is maintained by the SU2 Foundation                   |
+| (http://su2foundation.org)                                            |
+-------------------------------------------------------------------------
+| Copyright 2012-2020, SU2 Contributors (cf. AUTHORS.md)                |
+|                                                                       |
+| SU2 is free software; you can redistribute it and/or                  |
+| modify it under the terms of the GNU Lesser General Public            |
+| License as published by the Free Software Foundation; either          |
+| version 2.1 of the License, or (at your option) any later version.    |
+|                                                                       |
+| SU2 is distributed in the hope that it will be useful,                |
+| but WITHOUT ANY WARRANTY; without even the implied warranty of        |
+| MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU      |
+| Lesser General Public License for more details.                       |
+|                                                                       |
+| You should have received a copy of the GNU Lesser General Public      |
+| License along with SU2. If not, see <http://www.gnu.org/licenses/>.   |
+-------------------------------------------------------------------------
+"""
+
+# optimizers available through the -o/--optimization option
+_OPTIMIZERS = { 'SLSQP'  : SU2.opt.SLSQP  ,
+                'CG'     : SU2.opt.CG     ,
+                'BFGS'   : SU2.opt.BFGS   ,
+                'POWELL' : SU2.opt.POWELL }
+
 # -------------------------------------------------------------------
 #  Main 
 # -------------------------------------------------------------------
 
 def main():
 
-    parser=OptionParser()
-    parser.add_option("-f", "--file", dest="filename",
-                      help="read config from FILE", metavar="FILE")
-    parser.add_option("-r", "--name", dest="projectname", default='',
-                      help="try to restart from project file NAME", metavar="NAME")
-    parser.add_option("-n", "--partitions", dest="partitions", default=1,
-                      help="number of PARTITIONS", metavar="PARTITIONS")
-    parser.add_option("-g", "--gradient", dest="gradient", default="DISCRETE_ADJOINT",
-                      help="Method for computing the GRADIENT (CONTINUOUS_ADJOINT, DISCRETE_ADJOINT, FINDIFF, NONE)", metavar="GRADIENT")
-    parser.add_option("-o", "--optimization", dest="optimization", default="SLSQP",
-                      help="OPTIMIZATION techique (SLSQP, CG, BFGS, POWELL)", metavar="OPTIMIZATION")
-    parser.add_option("-q", "--quiet", dest="quiet", default="True",
-                      help="True/False Quiet all SU2 output (optimizer output only)", metavar="QUIET")
-    parser.add_option("-z", "--zones", dest="nzones", default="1",
-                      help="Number of Zones", metavar="ZONES")
-
-
-    (options, args)=parser.parse_args()
-    
-    # process inputs
-    options.partitions  = int( options.partitions )
-    options.quiet       = options.quiet.upper() == 'TRUE'
-    options.gradient    = options.gradient.upper()
-    options.nzones      = int( options.nzones )
+    parser=ArgumentParser()
+    parser.add_argument("-f", "--file", dest="filename",
+                        help="read config from FILE", metavar="FILE")
+    parser.add_argument("-r", "--name", dest="projectname", default='',
+                        help="try to restart from project file NAME", metavar="NAME")
+    parser.add_argument("-n", "--partitions", dest="partitions", default=1, type=int,
+                        help="number of PARTITIONS", metavar="PARTITIONS")
+    parser.add_argument("-g", "--gradient", dest="gradient", default="DISCRETE_ADJOINT", type=str.upper,
+                        choices=["CONTINUOUS_ADJOINT", "DISCRETE_ADJOINT", "FINDIFF", "NONE"],
+                        help="Method for computing the GRADIENT (CONTINUOUS_ADJOINT, DISCRETE_ADJOINT, FINDIFF, NONE)", metavar="GRADIENT")
+    parser.add_argument("-o", "--optimization", dest="optimization", default="SLSQP",
+                        choices=list(_OPTIMIZERS.keys()),
+                        help="OPTIMIZATION techique (SLSQP, CG, BFGS, POWELL)", metavar="OPTIMIZATION")
+    parser.add_argument("-q", "--quiet", dest="quiet", default=True, type=_str2bool,
+                        help="True/False Quiet all SU2 output (optimizer output only)", metavar="QUIET")
+    parser.add_argument("-z", "--zones", dest="nzones", default=1, type=int,
+                        help="Number of Zones", metavar="ZONES")
+
+    options=parser.parse_args()
     
-    sys.stdout.write('\n-------------------------------------------------------------------------\n')
-    sys.stdout.write('|    ___ _   _ ___                                                      |\n')
-    sys.stdout.write('|   / __| | | |_  )   Release 7.0.3 \"Blackbird\"                         |\n')
-    sys.stdout.write('|   \\__ \\ |_| |/ /                                                      |\n')
-    sys.stdout.write('|   |___/\\___//___|   Aerodynamic Shape Optimization Script             |\n')
-    sys.stdout.write('|                                                                       |\n')
-    sys.stdout.write('-------------------------------------------------------------------------\n')
-    sys.stdout.write('| SU2 Project Website: https://su2code.github.io                        |\n')
-    sys.stdout.write('|                                                                       |\n')
-    sys.stdout.write('| The SU2 Project is maintained by the SU2 Foundation                   |\n')
-    sys.stdout.write('| (http://su2foundation.org)                                            |\n')
-    sys.stdout.write('-------------------------------------------------------------------------\n')
-    sys.stdout.write('| Copyright 2012-2020, SU2 Contributors (cf. AUTHORS.md)                |\n')
-    sys.stdout.write('|                                                                       |\n')
-    sys.stdout.write('| SU2 is free software; you can redistribute it and/or                  |\n')
-    sys.stdout.write('| modify it under the terms of the GNU Lesser General Public            |\n')
-    sys.stdout.write('| License as published by the Free Software Foundation; either          |\n')
-    sys.stdout.write('| version 2.1 of the License, or (at your option) any later version.    |\n')
-    sys.stdout.write('|                                                                       |\n')
-    sys.stdout.write('| SU2 is distributed in the hope that it will be useful,                |\n')
-    sys.stdout.write('| but WITHOUT ANY WARRANTY; without even the implied warranty of        |\n')
-    sys.stdout.write('| MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU      |\n')
-    sys.stdout.write('| Lesser General Public License for more details.                       |\n')
-    sys.stdout.write('|                                                                       |\n')
-    sys.stdout.write('| You should have received a copy of the GNU Lesser General Public      |\n')
-    sys.stdout.write('| License along with SU2. If not, see <http://www.gnu.org/licenses/>.   |\n')
-    sys.stdout.write('-------------------------------------------------------------------------\n')
+    sys.stdout.write(_BANNER)
 
     shape_optimization( options.filename    ,
                         options.projectname ,
@@ -99,6 +107,12 @@ def main():
     
 #: main()
 
+def _str2bool(value):
+    """ converts a True/False command line value to bool """
+    return value.upper() in ('TRUE', 'YES', '1')
+
+#: _str2bool()
+
 def shape_optimization( filename                           ,
                         projectname = ''                   ,
                         partitions  = 0                    ,
@@ -106,25 +120,18 @@ def shape_optimization( filename                           ,
                         optimization = 'SLSQP'             ,
                         quiet       = False                ,
                         nzones      = 1                    ):
+    # check the optimizer before setting up the project
+    if not optimization in _OPTIMIZERS:
+        raise ValueError('Unknown optimization technique: %s' % optimization)
+    
     # Config
-    config = SU2.io.Config(filename)
+    config = _load_config_cached(filename)
     config.NUMBER_PART = partitions
     config.NZONES      = int( nzones )
     if quiet: config.CONSOLE = 'CONCISE'
     config.GRADIENT_METHOD = gradient
     
-    its               = int ( config.OPT_ITERATIONS )                      # number of opt iterations
-    bound_upper       = float ( config.OPT_BOUND_UPPER )                   # variable bound to be scaled by the line search
-    bound_lower       = float ( config.OPT_BOUND_LOWER )                   # variable bound to be scaled by the line search
-    relax_factor      = float ( config.OPT_RELAX_FACTOR )                  # line search scale
-    gradient_factor   = float ( config.OPT_GRADIENT_FACTOR )               # objective function and gradient scale
-    def_dv            = config.DEFINITION_DV                               # complete definition of the desing variable
-    n_dv              = sum(def_dv['SIZE'])                                # number of design variables
-    accu              = float ( config.OPT_ACCURACY ) * gradient_factor    # optimizer accuracy
-    x0                = [0.0]*n_dv # initial design
-    xb_low            = [float(bound_lower)/float(relax_factor)]*n_dv      # lower dv bound it includes the line search acceleration factor
-    xb_up             = [float(bound_upper)/float(relax_factor)]*n_dv      # upper dv bound it includes the line search acceleration fa
-    xb                = list(zip(xb_low, xb_up)) # design bounds
+    x0, xb, its, accu = _design_space(config)
     
     # State
     state = SU2.io.State()
@@ -138,24 +145,88 @@ def shape_optimization( filename                           ,
         project = SU2.opt.Project(config,state)
 
     # Optimize
-    if optimization == 'SLSQP':
-      SU2.opt.SLSQP(project,x0,xb,its,accu)
-    if optimization == 'CG':
-      SU2.opt.CG(project,x0,xb,its,accu)
-    if optimization == 'BFGS':
-      SU2.opt.BFGS(project,x0,xb,its,accu)
-    if optimization == 'POWELL':
-      SU2.opt.POWELL(project,x0,xb,its,accu)
-
+    _OPTIMIZERS[optimization](project,x0,xb,its,accu)
 
     # rename project file
     if projectname:
+        import shutil
         shutil.move('project.pkl',projectname)
     
     return project
 
 #: shape_optimization()
 
+def _design_space(config):
+    """ x0, xb, its, accu = _design_space(config)
+        initial design, bounds, iterations and accuracy of the optimizer.
+        x0 and xb are new lists on every call, the optimizers modify x0.
+        x0 is clamped so that x0/SCALE, as seen by the optimizer, lies
+        within the bounds. Whenever that moves x0, including on cached
+        calls, a notice is written to stdout.
+    """
+    x0, xb, its, accu, n_clip = _design_space_cached( config.OPT_ITERATIONS      ,
+                                                      config.OPT_BOUND_UPPER     ,
+                                                      config.OPT_BOUND_LOWER     ,
+                                                      config.OPT_RELAX_FACTOR    ,
+                                                      config.OPT_GRADIENT_FACTOR ,
+                                                      config.OPT_ACCURACY        ,
+                                                      tuple(config.DEFINITION_DV['SIZE'])  ,
+                                                      tuple(config.DEFINITION_DV['SCALE']) )
+    if n_clip:
+        sys.stdout.write('Initial design outside of the design variable bounds, clamping %i of %i variables\n'
+                         % (n_clip, len(x0)))
+    
+    return list(x0), list(xb), its, accu
+
+#: _design_space()
+
+@lru_cache(maxsize=8)
+def _design_space_cached(iterations, upper, lower, relax, grad_factor, accuracy, dv_size, dv_scale):
+    its               = int ( iterations )                                 # number of opt iterations
+    bound_upper       = float ( upper )                                    # variable bound to be scaled by the line search
+    bound_lower       = float ( lower )                                    # variable bound to be scaled by the line search
+    relax_factor      = float ( relax )                                    # line search scale
+    gradient_factor   = float ( grad_factor )                              # objective function and gradient scale
+    n_dv              = int(np.fromiter(dv_size, dtype=np.int64).sum())    # number of design variables
+    accu              = float ( accuracy ) * gradient_factor               # optimizer accuracy
+    x0                = np.zeros(n_dv)                                     # initial design
+    xb_low            = np.full(n_dv, bound_lower/relax_factor)            # lower dv bound it includes the line search acceleration factor
+    xb_up             = np.full(n_dv, bound_upper/relax_factor)            # upper dv bound it includes the line search acceleration factor
+    xb                = tuple(zip(xb_low.tolist(), xb_up.tolist()))        # design bounds
+    
+    # the initial design must be feasible, the optimizers divide x0 by the
+    # dv scale but not the bounds, so clamp against the bounds times the scale
+    scale             = np.repeat(np.asarray(dv_scale, dtype=float), dv_size)
+    x0_low            = np.minimum(xb_low*scale, xb_up*scale)
+    x0_up             = np.maximum(xb_low*scale, xb_up*scale)
+    x0_clip           = np.clip(x0, x0_low, x0_up)
+    n_clip            = int(np.count_nonzero(x0_clip != x0))
+    
+    return tuple(x0_clip.tolist()), xb, its, accu, n_clip
+
+#: _design_space_cached()
+
+# -------------------------------------------------------------------
+#  Cached Setup
+# -------------------------------------------------------------------
+
+@lru_cache(maxsize=8)
+def _read_config(filename, abspath, mtime):
+    """ parsed config, memoized on the file path and modification time """
+    return SU2.io.Config(filename)
+
+#: _read_config()
+
+def _load_config_cached(filename):
+    """ config = _load_config_cached(filename)
+        returns a private copy of the parsed config, so callers
+        may modify it without touching the cached entry
+    """
+    abspath = os.path.abspath(filename)
+    config  = _read_config(filename, abspath, os.path.getmtime(abspath))
+    return copy.deepcopy(config)
+
+#: _load_config_cached()
 
 # -------------------------------------------------------------------
 #  Run Main Program